@@ -0,0 +1,94 @@
+"""SQLite-backed key-value cache for article content and Gemini results."""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from hndigest.config import CACHE_DB
+
+
+class KVCache:
+    """Single-file key-value store replacing per-entry cache files.
+
+    WAL mode with NORMAL synchronous turns each lookup into one prepared
+    SELECT instead of a stat+open+read, and lets writes batch into a
+    single transaction.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "CREATE TABLE IF NOT EXISTS kv (k TEXT PRIMARY KEY, v TEXT);"
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            "k TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, fetched_at REAL);"
+        )
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            row = self.conn.execute("SELECT v FROM kv WHERE k = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """Fetch all present keys in one SELECT round-trip."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT k, v FROM kv WHERE k IN ({placeholders})", keys
+            ).fetchall()
+        return dict(rows)
+
+    def set(self, key: str, value: str) -> None:
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO kv (k, v) VALUES (?, ?)", (key, value))
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM kv WHERE k = ?", (key,))
+
+    def get_response(self, key: str) -> tuple[str, str, bytes] | None:
+        """Cached (etag, last_modified, body) for a conditional HTTP GET."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE k = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1], row[2]) if row else None
+
+    def set_response(self, key: str, etag: str, last_modified: str, body: bytes) -> None:
+        """Store a response body with its validators for later revalidation."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_cache (k, etag, last_modified, body, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, etag, last_modified, body, time.time()),
+            )
+
+    def set_many(self, items: list[tuple[str, str]]) -> None:
+        """Write all items in one transaction."""
+        if not items:
+            return
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany("INSERT OR REPLACE INTO kv (k, v) VALUES (?, ?)", items)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+
+_cache: KVCache | None = None
+
+
+def get_cache() -> KVCache:
+    """Return the shared process-wide cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = KVCache(CACHE_DB)
+    return _cache
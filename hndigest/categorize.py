@@ -1,11 +1,14 @@
-"""Gemini-based story categorization and ranking with file caching."""
+"""Gemini-based story categorization and ranking with caching."""
 
-import hashlib
-import time
+import re
 
 import httpx
+import orjson
+from xxhash import xxh3_64_hexdigest
 
-from hndigest.config import CACHE_DIR, GEMINI_API, log
+from hndigest.cache import get_cache
+from hndigest.config import GEMINI_API, log
+from hndigest.http import JSON_HEADERS, MAX_RETRIES, retryable, sleep_for_retry
 
 CATEGORIZE_PROMPT = """You are a Hacker News editor curating a weekly digest.
 
@@ -37,7 +40,16 @@ Return EXACTLY one line per story:
 2. category=dev, rank=regular
 ..."""
 
-VALID_CATEGORIES = {
+# Numbered response lines ("1. ..."), matched in one scan of the full response
+_RESP_RE = re.compile(r"^\s*(\d+)\.\s*(.+)$", re.MULTILINE)
+
+# One pass over "category=ai, rank=top" lines (response and cache share the format)
+_LINE_RE = re.compile(r"category\s*=\s*(?P<cat>\w+).*?rank\s*=\s*(?P<rank>\w+)")
+
+# Split once at import so the hot path only pays for joining story lines
+_PROMPT_PRE, _PROMPT_POST = CATEGORIZE_PROMPT.split("{stories}")
+
+VALID_CATEGORIES: frozenset[str] = frozenset({
     "ai",
     "dev",
     "ops",
@@ -47,7 +59,7 @@ VALID_CATEGORIES = {
     "tech",
     "career",
     "culture",
-}
+})
 
 
 def categorize_and_rank_batch(
@@ -62,16 +74,17 @@ def categorize_and_rank_batch(
     if not api_key or not stories:
         return {}
 
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache = get_cache()
+
+    # One bulk read for all stories instead of a round-trip per key
+    keys = {s["id"]: _cache_key(s) for s in stories}
+    found = cache.get_many(list(keys.values()))
 
-    # Check cache
     cached: dict[int, tuple[str, bool]] = {}
     uncached: list[dict] = []
     for s in stories:
-        cache_key = hashlib.md5(f"cat_v1|{s['id']}|{s['title']}".encode()).hexdigest()
-        cache_file = CACHE_DIR / f"{cache_key}.txt"
-        if cache_file.exists():
-            val = cache_file.read_text(encoding="utf-8").strip()
+        val = found.get(keys[s["id"]])
+        if val is not None:
             cat, is_top = _parse_cache_value(val)
             if cat:
                 cached[s["id"]] = (cat, is_top)
@@ -90,59 +103,46 @@ def categorize_and_rank_batch(
         comments = s.get("comments", 0)
         story_lines.append(f"{i + 1}. {s['title']} ({points} pts, {comments} comments)")
 
-    prompt = CATEGORIZE_PROMPT.format(stories="\n".join(story_lines))
+    prompt = _PROMPT_PRE + "\n".join(story_lines) + _PROMPT_POST
 
-    for attempt in range(3):
+    for attempt in range(MAX_RETRIES):
         try:
             r = session.post(
                 f"{GEMINI_API}?key={api_key}",
-                json={
+                content=orjson.dumps({
                     "contents": [{"parts": [{"text": prompt}]}],
                     "generationConfig": {"temperature": 0.3, "maxOutputTokens": 4000},
-                },
+                }),
+                headers=JSON_HEADERS,
                 timeout=90,
             )
             r.raise_for_status()
-            result = r.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
+            result = orjson.loads(r.content)["candidates"][0]["content"]["parts"][0]["text"]
+            result = result.strip()
 
             # Parse response
-            for line in result.split("\n"):
-                line = line.strip()
-                if not line or not line[0].isdigit():
-                    continue
-                parts = line.split(".", 1)
-                if len(parts) != 2:
-                    continue
-                try:
-                    num = int(parts[0].strip()) - 1
-                except ValueError:
-                    continue
+            for rm in _RESP_RE.finditer(result):
+                num = int(rm.group(1)) - 1
                 if not (0 <= num < len(uncached)):
                     continue
 
-                rest = parts[1].strip().lower()
-                cat = _extract_field(rest, "category")
-                rank = _extract_field(rest, "rank")
-
+                m = _LINE_RE.search(rm.group(2).lower())
+                cat = m.group("cat") if m else ""
                 if cat not in VALID_CATEGORIES:
                     cat = "culture"
-                is_top = rank == "top"
+                is_top = m.group("rank") == "top" if m else False
 
                 s = uncached[num]
                 cached[s["id"]] = (cat, is_top)
 
-                # Write cache
-                cache_key = hashlib.md5(f"cat_v1|{s['id']}|{s['title']}".encode()).hexdigest()
-                cache_file = CACHE_DIR / f"{cache_key}.txt"
                 cache_val = f"category={cat},rank={'top' if is_top else 'regular'}"
-                cache_file.write_text(cache_val, encoding="utf-8")
+                cache.set(_cache_key(s), cache_val)
 
             break
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                wait = (attempt + 1) * 10
-                log.warning(f"Rate limited, waiting {wait}s...")
-                time.sleep(wait)
+            if retryable(e.response):
+                log.warning(f"Retryable error ({e.response.status_code}), backing off...")
+                sleep_for_retry(e.response, attempt)
             else:
                 log.warning(f"Categorization failed: {e}")
                 break
@@ -153,19 +153,14 @@ def categorize_and_rank_batch(
     return cached
 
 
-def _extract_field(text: str, field: str) -> str:
-    """Extract value from 'field=value' in text like 'category=ai, rank=top'."""
-    for part in text.split(","):
-        part = part.strip()
-        if part.startswith(f"{field}="):
-            return part.split("=", 1)[1].strip()
-    return ""
+def _cache_key(story: dict) -> str:
+    """Cache key for one story's categorization result."""
+    return "cat|" + xxh3_64_hexdigest(f"cat_v1|{story['id']}|{story['title']}".encode())
 
 
 def _parse_cache_value(val: str) -> tuple[str, bool]:
     """Parse cached value like 'category=ai,rank=top'. Returns (category, is_top)."""
-    cat = _extract_field(val, "category")
-    rank = _extract_field(val, "rank")
-    if cat not in VALID_CATEGORIES:
+    m = _LINE_RE.search(val)
+    if not m or m.group("cat") not in VALID_CATEGORIES:
         return ("", False)
-    return (cat, rank == "top")
+    return (m.group("cat"), m.group("rank") == "top")
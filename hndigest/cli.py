@@ -2,82 +2,76 @@
 
 import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 
-import httpx
-
 from hndigest.config import CHANNELS, Channel, categorize_story, log
 from hndigest.content import fetch_articles
 from hndigest.formatter import format_digest, update_main_with_links
 from hndigest.hn import fetch_stories, select_stories
-from hndigest.http import get_client
 from hndigest.process import process_stories
 from hndigest.telegram import post_thread
 
 
-def generate_digest(channel: Channel, session: httpx.Client) -> tuple[list[str], list[str]]:
+def generate_digest(channel: Channel) -> tuple[list[str], list[str]]:
     """Generate digest for a channel. Returns (messages, reply_categories)."""
     log.info(f"Generating {channel.telegram}...")
 
-    stories = fetch_stories(session, channel.days, channel.min_points)
+    # Main, Show HN, and Ask HN queries are independent round-trips — run them
+    # concurrently (Show/Ask use lower min_points to ensure results)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        f_main = pool.submit(fetch_stories, channel.days, channel.min_points)
+        f_show = pool.submit(fetch_stories, channel.days, 30, "show_hn")
+        f_ask = pool.submit(fetch_stories, channel.days, 30, "ask_hn")
+        stories, show_hn, ask_hn = f_main.result(), f_show.result(), f_ask.result()
     log.info(f"Fetched {len(stories)} stories")
-
-    # Fetch Show HN and Ask HN separately (lower min_points to ensure results)
-    show_hn = fetch_stories(session, channel.days, min_points=30, tag="show_hn")
-    ask_hn = fetch_stories(session, channel.days, min_points=30, tag="ask_hn")
     log.info(f"Fetched {len(show_hn)} Show HN, {len(ask_hn)} Ask HN")
 
     top = select_stories(stories, channel.limit)
 
     # Add top Show HN and Ask HN if not already included
-    existing_ids = {s["id"] for s in top}
-    show_selected = select_stories(show_hn, 2)
-    ask_selected = select_stories(ask_hn, 2)
-
-    for s in show_selected + ask_selected:
-        if s["id"] not in existing_ids:
+    existing_ids = {s.id for s in top}
+    for s in chain(select_stories(show_hn, 2), select_stories(ask_hn, 2)):
+        if s.id not in existing_ids:
             top.append(s)
-            existing_ids.add(s["id"])
+            existing_ids.add(s.id)
 
     log.info(f"Selected {len(top)} stories (incl. Show/Ask HN)")
 
     # Fetch article content
     log.info("Fetching article content...")
-    article_contents = fetch_articles(session, top)
+    article_contents = fetch_articles(top)
 
     api_key = os.environ.get("GEMINI_API_KEY", "")
 
-    # One Gemini call: categorize, rank, translate, and summarize
+    # Unified Gemini processing: categorize, rank, translate, and summarize
     if api_key:
         log.info("Processing stories via Gemini...")
-        results = process_stories(session, api_key, top, article_contents, channel)
-        for s in top:
-            r = results.get(s["id"])
-            if r:
-                if s["title"].lower().startswith("show hn"):
-                    s["category"] = "show_hn"
-                elif s["title"].lower().startswith("ask hn"):
-                    s["category"] = "ask_hn"
-                else:
-                    s["category"] = r.category
-                s["is_top"] = r.is_top
-            else:
-                s["category"] = categorize_story(s)
-                s["is_top"] = False
-        titles = {s["id"]: results[s["id"]].translation for s in top if s["id"] in results}
-        summaries = {s["id"]: results[s["id"]].summary for s in top if s["id"] in results}
-        # Fill in any missing stories with defaults
-        for s in top:
-            if s["id"] not in titles:
-                titles[s["id"]] = s["title"]
-            if s["id"] not in summaries:
-                summaries[s["id"]] = ""
+        results = process_stories(api_key, top, article_contents, channel)
     else:
-        for s in top:
-            s["category"] = categorize_story(s)
-            s["is_top"] = False
-        titles = {s["id"]: s["title"] for s in top}
-        summaries = {s["id"]: "" for s in top}
+        results = {}
+
+    # One pass over the selected stories fills categories, titles, and summaries
+    titles: dict[int, str] = {}
+    summaries: dict[int, str] = {}
+    for s in top:
+        r = results.get(s.id)
+        if r:
+            if s.title_lower.startswith("show hn"):
+                s.category = "show_hn"
+            elif s.title_lower.startswith("ask hn"):
+                s.category = "ask_hn"
+            else:
+                s.category = r.category
+            s.is_top = r.is_top
+            titles[s.id] = r.translation or s.title
+            summaries[s.id] = r.summary
+        else:
+            s.category = categorize_story(s)
+            s.is_top = False
+            titles[s.id] = s.title
+            summaries[s.id] = ""
 
     return format_digest(channel, top, titles, summaries)
 
@@ -96,32 +90,51 @@ def main() -> int:
             print(f"{c.id:12} {c.telegram:16} ({c.language})")
         return 0
 
-    session = get_client()
     channels = list(CHANNELS.values()) if args.all else [CHANNELS[args.channel]]
 
-    for channel in channels:
-        messages, reply_categories = generate_digest(channel, session)
-
-        if args.post:
-            token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
-            if not token:
-                log.error("TELEGRAM_BOT_TOKEN not set")
-                return 1
-            username = channel.telegram.lstrip("@")
-
-            def make_edit_callback(usr: str, lang: str):
-                def callback(main_text, cats, msg_ids):
-                    return update_main_with_links(main_text, cats, msg_ids, usr, lang)
-                return callback
-
-            post_thread(
-                token,
-                channel.telegram,
-                messages,
-                reply_categories=reply_categories,
-                edit_main_callback=make_edit_callback(username, channel.language),
-            )
-        elif args.out:
+    # Channels are independent pipelines — run them concurrently; shared
+    # content/Gemini caches make later channels near-free. Only file and
+    # stdout output stay serialized below so they come out ordered.
+    if len(channels) > 1:
+        with ThreadPoolExecutor(max_workers=len(channels)) as pool:
+            futures = [pool.submit(generate_digest, c) for c in channels]
+            digests = [f.result() for f in futures]
+    else:
+        digests = [generate_digest(channels[0])]
+
+    if args.post:
+        token = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+        if not token:
+            log.error("TELEGRAM_BOT_TOKEN not set")
+            return 1
+
+        def make_edit_callback(usr: str, lang: str):
+            def callback(main_text, cats, msg_ids):
+                return update_main_with_links(main_text, cats, msg_ids, usr, lang)
+            return callback
+
+        # Each thread goes to a different Telegram channel, so per-channel
+        # rate limits don't interact and the posts can overlap
+        with ThreadPoolExecutor(max_workers=len(channels)) as pool:
+            posts = [
+                pool.submit(
+                    post_thread,
+                    token,
+                    channel.telegram,
+                    messages,
+                    reply_categories=reply_categories,
+                    edit_main_callback=make_edit_callback(
+                        channel.telegram.lstrip("@"), channel.language
+                    ),
+                )
+                for channel, (messages, reply_categories) in zip(channels, digests)
+            ]
+            for f in posts:
+                f.result()
+        return 0
+
+    for channel, (messages, reply_categories) in zip(channels, digests):
+        if args.out:
             Path(args.out).write_text("\n\n---\n\n".join(messages), encoding="utf-8")
             log.info(f"Saved to {args.out}")
         else:
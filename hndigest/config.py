@@ -2,10 +2,17 @@
 
 import logging
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import ahocorasick
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from hndigest.hn import Story
+
 load_dotenv()
 
 
@@ -22,6 +29,16 @@ class Channel:
     limit: int = 50
     min_points: int = 50
 
+    @cached_property
+    def first_issue_dt(self) -> datetime:
+        """first_issue_date parsed once as an aware UTC datetime."""
+        return datetime.fromisoformat(self.first_issue_date).replace(tzinfo=timezone.utc)
+
+    @cached_property
+    def months(self) -> list[str]:
+        """Localized month names for this channel's language."""
+        return MONTHS.get(self.language, MONTHS["en"])
+
 
 CHANNELS: dict[str, Channel] = {
     "hn_uz": Channel(
@@ -57,13 +74,17 @@ Muhim: oʻzbek tilidagi maxsus harflarni toʻgʻri yoz — oʻ (o + ʻ), gʻ (g
 }
 
 # Constants
-CACHE_DIR = Path("./cache/gemini")
-CONTENT_CACHE_DIR = Path("./cache/content")
+CACHE_DB = Path("./cache/hndigest.db")
 HN_API = "https://hn.algolia.com/api/v1/search_by_date"
 HN_ITEM = "https://news.ycombinator.com/item?id={}"
+GEMINI_MODEL = "models/gemini-2.0-flash"
 GEMINI_API = (
     "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 )
+GEMINI_STREAM_API = (
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent"
+)
+GEMINI_CACHE_API = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
 TELEGRAM_API = "https://api.telegram.org/bot{}/sendMessage"
 TELEGRAM_EDIT_API = "https://api.telegram.org/bot{}/editMessageText"
 
@@ -317,31 +338,73 @@ CATEGORIES: dict[str, dict[str, list[str]]] = {
 }
 
 
+# Categories in match priority order: Show HN / Ask HN first, then declaration order
+_CATEGORY_PRIORITY = ["show_hn", "ask_hn"] + [
+    k for k in CATEGORIES if k not in ("show_hn", "ask_hn")
+]
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Compile all category keywords into one Aho-Corasick automaton.
+
+    Each keyword maps to (priority_rank, category) so a single linear scan
+    of the title replaces per-category substring loops.
+    """
+    automaton = ahocorasick.Automaton()
+    for rank, cat_key in enumerate(_CATEGORY_PRIORITY):
+        for kw in CATEGORIES[cat_key]["keywords"]:
+            existing = automaton.get(kw, None)
+            if existing is None or rank < existing[0]:
+                automaton.add_word(kw, (rank, cat_key))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+# Domain → category, looked up by exact suffix instead of substring scans
+_DOMAIN_TO_CAT: dict[str, str] = {
+    d: cat for cat, rules in CATEGORIES.items() for d in rules["domains"]
+}
+
+
 def category_name(key: str, language: str) -> str:
     """Get localized category display name."""
     return CATEGORY_NAMES.get(key, {}).get(language, key)
 
 
-def categorize_story(story: dict) -> str:
+def categorize_story(story: "Story") -> str:
     """Categorize a story based on title keywords and domain."""
-    title_lower = story["title"].lower()
-    domain = story.get("domain", "").lower()
-
-    # Check Show HN / Ask HN first — they take priority
-    for priority_key in ("show_hn", "ask_hn"):
-        for kw in CATEGORIES[priority_key]["keywords"]:
-            if kw in title_lower:
-                return priority_key
-
-    for cat_key, rules in CATEGORIES.items():
-        if cat_key in ("show_hn", "ask_hn"):
-            continue
-        for kw in rules["keywords"]:
-            if kw in title_lower:
-                return cat_key
-        for d in rules["domains"]:
-            if d in domain:
-                return cat_key
+    return _categorize_cached(story.title_lower, story.domain.lower())
+
+
+@lru_cache(maxsize=4096)
+def _categorize_cached(title_lower: str, domain: str) -> str:
+    """Domain/keyword categorization, memoized per unique (title, domain)."""
+    # Show/Ask HN come from the title and outrank everything else
+    if "show hn" in title_lower:
+        return "show_hn"
+    if "ask hn" in title_lower:
+        return "ask_hn"
+
+    # Known domains decide outright — a couple of O(1) suffix lookups
+    # ("blog.nasa.gov" → "nasa.gov", never the bare TLD) beat any title scan
+    if domain:
+        parts = domain.split(".")
+        for i in range(len(parts) - 1):
+            cat = _DOMAIN_TO_CAT.get(".".join(parts[i:]))
+            if cat is not None:
+                return cat
+
+    # One pass over the title; lowest rank (highest priority category) wins
+    best: tuple[int, str] | None = None
+    for _, match in _KEYWORD_AUTOMATON.iter(title_lower):
+        if best is None or match[0] < best[0]:
+            best = match
+            if best[0] == 0:  # show_hn — nothing can outrank it
+                break
+    if best is not None:
+        return best[1]
 
     return "culture"
 
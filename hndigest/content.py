@@ -1,86 +1,121 @@
-"""Article content fetching with trafilatura extraction and file caching."""
+"""Article content fetching with trafilatura extraction and caching."""
 
-import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
 
 import httpx
 import trafilatura
+import xxhash
 
-from hndigest.config import CONTENT_CACHE_DIR, log
+from hndigest.cache import get_cache
+from hndigest.config import log
+from hndigest.hn import Story
+from hndigest.http import get_async_client
 
 MAX_WORDS = 3000
-FETCH_TIMEOUT = 15
+
+# Bot-walled or JS-only sites where trafilatura yields nothing — not worth a
+# network round-trip and a 15s timeout
+NON_EXTRACTABLE_DOMAINS = frozenset(
+    {"twitter.com", "x.com", "youtube.com", "youtu.be", "github.com"}
+)
+
+
+_WORD_RE = re.compile(r"\S+")
 
 
 def _truncate_words(text: str, max_words: int = MAX_WORDS) -> str:
-    """Truncate text to max_words."""
-    words = text.split()
-    if len(words) <= max_words:
-        return text
-    return " ".join(words[:max_words])
+    """Truncate text to max_words.
+
+    Counts words with a streaming scan — text.split() would materialize a
+    list of every word in a potentially megabyte-sized article just to
+    check its length.
+    """
+    count = 0
+    for m in _WORD_RE.finditer(text):
+        count += 1
+        if count > max_words:
+            return text[: m.start()].rstrip()
+    return text
+
 
+def _content_key(url: str) -> str:
+    """Return cache key for a URL."""
+    return f"content|{xxhash.xxh3_128(url.encode()).hexdigest()}"
 
-def _cache_path(url: str):
-    """Return cache file path for a URL."""
-    return CONTENT_CACHE_DIR / f"{hashlib.md5(url.encode()).hexdigest()}.txt"
 
+def _extract_and_truncate(html: str) -> str:
+    """Extract and truncate article text from raw HTML (runs in a worker process)."""
+    if not html:
+        return ""
+    extracted = trafilatura.extract(
+        html, fast=True, include_comments=False, include_tables=False
+    )
+    return _truncate_words(extracted) if extracted else ""
 
-def _fetch_one(session: httpx.Client, url: str) -> str:
-    """Fetch and extract article text from a single URL."""
-    cache_file = _cache_path(url)
-    if cache_file.exists():
-        return cache_file.read_text(encoding="utf-8")
 
-    text = ""
+async def _fetch_one(client: httpx.AsyncClient, url: str) -> str:
+    """Fetch raw HTML from a single URL."""
     try:
-        r = session.get(url, timeout=FETCH_TIMEOUT, follow_redirects=True)
+        r = await client.get(url)
         r.raise_for_status()
-        extracted = trafilatura.extract(r.text)
-        if extracted:
-            text = _truncate_words(extracted)
+        return r.text
     except Exception as e:
         log.debug(f"Failed to fetch {url}: {e}")
+        return ""
 
-    cache_file.write_text(text, encoding="utf-8")
-    return text
 
+async def _fetch_all(urls: list[str]) -> list[str | BaseException]:
+    """Fetch all URLs concurrently over one HTTP/2 connection pool."""
+    async with get_async_client() as client:
+        tasks = [asyncio.create_task(_fetch_one(client, url)) for url in urls]
+        return await asyncio.gather(*tasks, return_exceptions=True)
 
-def fetch_articles(
-    session: httpx.Client, stories: list[dict], max_workers: int = 10
-) -> dict[int, str]:
-    """Fetch article content for stories in parallel.
 
-    Returns a dict mapping story ID to extracted article text.
-    Stories without URLs (Ask HN, etc.) get empty strings.
-    """
-    CONTENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+def fetch_articles(stories: list[Story]) -> dict[int, str]:
+    """Fetch article content for stories concurrently.
 
+    Each unique URL is fetched once and fanned back out to its stories.
+    Stories without URLs (Ask HN, etc.) and stories on non-extractable
+    domains get empty strings.
+    """
+    cache = get_cache()
     results: dict[int, str] = {}
-    url_stories: list[dict] = []
+    url_to_ids: dict[str, list[int]] = {}
 
     for story in stories:
-        url = story.get("url", "")
-        if not url:
-            results[story["id"]] = ""
+        url = story.url
+        if not url or urlsplit(url).netloc.removeprefix("www.") in NON_EXTRACTABLE_DOMAINS:
+            results[story.id] = ""
+            continue
+        cached = cache.get(_content_key(url))
+        if cached is not None:
+            results[story.id] = cached
         else:
-            url_stories.append(story)
+            url_to_ids.setdefault(url, []).append(story.id)
 
-    if not url_stories:
+    if not url_to_ids:
         return results
 
-    log.info(f"Fetching content for {len(url_stories)} articles...")
-
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        future_to_story = {
-            pool.submit(_fetch_one, session, s["url"]): s for s in url_stories
-        }
-        for future in as_completed(future_to_story):
-            story = future_to_story[future]
-            try:
-                results[story["id"]] = future.result()
-            except Exception:
-                results[story["id"]] = ""
-
-    fetched = sum(1 for v in results.values() if v)
-    log.info(f"Extracted content from {fetched}/{len(url_stories)} articles")
+    urls = list(url_to_ids)
+    log.info(f"Fetching content for {len(urls)} articles...")
+
+    htmls = [h if isinstance(h, str) else "" for h in asyncio.run(_fetch_all(urls))]
+
+    # trafilatura is CPU-bound pure Python — parse across cores, not under the GIL
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        texts = list(pool.map(_extract_and_truncate, htmls, chunksize=4))
+
+    to_cache: list[tuple[str, str]] = []
+    for url, text in zip(urls, texts):
+        for story_id in url_to_ids[url]:
+            results[story_id] = text
+        to_cache.append((_content_key(url), text))
+    cache.set_many(to_cache)
+
+    fetched = sum(1 for v in to_cache if v[1])
+    log.info(f"Extracted content from {fetched}/{len(urls)} articles")
     return results
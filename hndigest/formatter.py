@@ -1,20 +1,38 @@
 """Telegram HTML formatting for digests."""
 
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 
 from hndigest.config import (
     HN_ITEM,
     LABELS,
-    MONTHS,
     Channel,
-    categorize_story,
     category_name,
 )
+from hndigest.hn import Story
+
+# Reply order for category threads
+CATEGORY_ORDER = [
+    "ai",
+    "dev",
+    "ops",
+    "data",
+    "science",
+    "security",
+    "tech",
+    "career",
+    "culture",
+    "show_hn",
+    "ask_hn",
+]
+
+# One-pass escape table — three chained str.replace calls rescan and reallocate
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
 
 
 def escape_html(text: str) -> str:
     """Escape HTML special characters."""
-    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text.translate(_HTML_ESCAPE)
 
 
 def format_category_header(cat_key: str, lang: str) -> str:
@@ -25,7 +43,7 @@ def format_category_header(cat_key: str, lang: str) -> str:
 
 def format_digest(
     channel: Channel,
-    stories: list[dict],
+    stories: list[Story],
     titles: dict[int, str],
     summaries: dict[int, str] | None = None,
 ) -> tuple[list[str], list[str]]:
@@ -37,30 +55,28 @@ def format_digest(
     """
     now = datetime.now(timezone.utc)
     start = now - timedelta(days=channel.days)
-    first = datetime.fromisoformat(channel.first_issue_date).replace(tzinfo=timezone.utc)
-    issue = max(1, (now - first).days // 7 + 1)
+    issue = max(1, (now - channel.first_issue_dt).days // 7 + 1)
     lang = channel.language
 
-    months = MONTHS.get(lang, MONTHS["en"])
+    months = channel.months
     start_str = f"{start.day} {months[start.month - 1]}"
     now_str = f"{now.day} {months[now.month - 1]} {now.year}"
 
     sums = summaries or {}
 
     # Top stories: use is_top flag, fallback to first 10
-    top_stories = [s for s in stories if s.get("is_top")]
+    top_stories = [s for s in stories if s.is_top]
     if not top_stories:
         top_stories = stories[:10]
     top_stories = top_stories[:10]
-    top_ids = {s["id"] for s in top_stories}
+    top_ids = {s.id for s in top_stories}
 
-    # Group non-top stories by category
-    by_category: dict[str, list[dict]] = {}
+    # Group non-top stories by category (always populated upstream)
+    by_category: dict[str, list[Story]] = defaultdict(list)
     for s in stories:
-        if s["id"] in top_ids:
+        if s.id in top_ids:
             continue
-        cat = s.get("category") or categorize_story(s)
-        by_category.setdefault(cat, []).append(s)
+        by_category[s.category].append(s)
 
     # --- Main post: header + top 10 ---
     main_lines = [
@@ -74,23 +90,8 @@ def format_digest(
 
     tag = f"#digest_{issue}"
 
-    # --- Category replies (5 per category) ---
-    category_order = [
-        "ai",
-        "dev",
-        "ops",
-        "data",
-        "science",
-        "security",
-        "tech",
-        "career",
-        "culture",
-        "show_hn",
-        "ask_hn",
-    ]
-
     # Build category teaser line for main post
-    active_cats = [k for k in category_order if k in by_category]
+    active_cats = [k for k in CATEGORY_ORDER if k in by_category]
     if active_cats:
         cat_labels = " \u00b7 ".join(category_name(k, lang) for k in active_cats)
         main_lines.append("")
@@ -103,7 +104,8 @@ def format_digest(
     messages = ["\n".join(main_lines)]
     reply_categories: list[str] = []
 
-    for cat_key in category_order:
+    # --- Category replies (5 per category) ---
+    for cat_key in CATEGORY_ORDER:
         cat_stories = by_category.get(cat_key, [])
         if not cat_stories:
             continue
@@ -152,43 +154,34 @@ def update_main_with_links(
 
 
 def format_story_lines(
-    s: dict,
+    s: Story,
     titles: dict[int, str],
     summaries: dict[int, str] | None = None,
     lang: str = "en",
 ) -> list[str]:
     """Format a single story: bold title, summary, italic metadata."""
-    title = escape_html(titles.get(s["id"], s["title"]))
-    url = s["url"]
-    hn_url = HN_ITEM.format(s["id"])
-    comments = s.get("comments", 0)
-    points = s.get("points", 0)
+    title = escape_html(titles.get(s.id, s.title))
+    url = s.url
+    hn_url = HN_ITEM.format(s.id)
+    comments = s.comments
+    points = s.points
     lbl_points = LABELS["points"].get(lang, "points")
     lbl_comments = LABELS["comments"].get(lang, "comments")
 
-    cat = s.get("category", "")
-    is_hn_thread = cat in ("show_hn", "ask_hn")
+    # Show/Ask HN: title links to the HN item, plain comment count, no summary
+    if s.category in ("show_hn", "ask_hn"):
+        return [
+            f'<b><a href="{hn_url}">{title}</a></b>',
+            f"<i>{points}\u00a0{lbl_points} \u00b7 {comments}\u00a0{lbl_comments}</i>",
+        ]
 
-    # Title: Show/Ask HN link to HN item, others link to external URL
-    if is_hn_thread:
-        title_line = f'<b><a href="{hn_url}">{title}</a></b>'
-    elif url:
+    if url:
         title_line = f'<b><a href="{url}">{title}</a></b>'
     else:
         title_line = f"<b>{title}</b>"
+    meta_line = f'<i>{points}\u00a0{lbl_points} \u00b7 <a href="{hn_url}">{comments}\u00a0{lbl_comments}</a></i>'
 
-    result = [title_line]
-
-    # No summaries for Show/Ask HN
-    if not is_hn_thread:
-        summary = (summaries or {}).get(s["id"], "")
-        if summary:
-            result.append(escape_html(summary))
-
-    # Comments: plain text for Show/Ask HN, linked for others
-    if is_hn_thread:
-        meta_line = f"<i>{points}\u00a0{lbl_points} \u00b7 {comments}\u00a0{lbl_comments}</i>"
-    else:
-        meta_line = f'<i>{points}\u00a0{lbl_points} \u00b7 <a href="{hn_url}">{comments}\u00a0{lbl_comments}</a></i>'
-    result.append(meta_line)
-    return result
+    summary = (summaries or {}).get(s.id, "")
+    if summary:
+        return [title_line, escape_html(summary), meta_line]
+    return [title_line, meta_line]
@@ -1,76 +1,163 @@
 """Hacker News API: fetch and select stories."""
 
-import time
+import asyncio
+import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from urllib.parse import urlparse
+from functools import lru_cache
+from operator import attrgetter
 
 import httpx
+import orjson
 
+from hndigest.cache import get_cache
 from hndigest.config import HN_API, JOB_WORDS, log
+from hndigest.http import get_async_client
 
+MAX_PAGES = 5
 
-def _parse_hits(hits: list[dict]) -> list[dict]:
-    """Parse API hits into story dicts."""
+# Single-field extraction; ~3x faster than urlparse for this purpose
+_DOMAIN_RE = re.compile(r"https?://(?:www\.)?([^/]+)")
+
+# One alternation scan instead of a Python loop over JOB_WORDS; shortest words
+# first so overlapping terms ("hiring" vs "who is hiring") match cheaply
+_JOB_RE = re.compile("|".join(re.escape(w) for w in sorted(set(JOB_WORDS), key=len)))
+
+
+@lru_cache(maxsize=4096)
+def _domain(url: str) -> str:
+    """Extract the bare domain; memoized since channels share most URLs."""
+    m = _DOMAIN_RE.match(url)
+    return m.group(1) if m else ""
+
+
+@dataclass(slots=True)
+class Story:
+    """One HN story; slots keep ~500 per run compact vs per-story dicts."""
+
+    id: int
+    title: str
+    # Lowered once at parse time; select_stories, categorize_story, and the
+    # Show/Ask HN checks all read it instead of re-lowering
+    title_lower: str
+    url: str
+    points: int
+    comments: int
+    score: int = 0
+    domain: str = ""
+    category: str = ""
+    is_top: bool = False
+
+
+def _parse_hits(hits: list[dict]) -> list[Story]:
+    """Parse API hits into Story objects."""
     return [
-        {
-            "id": int(h["objectID"]),
-            "title": h.get("title", ""),
-            "url": h.get("url", ""),
-            "points": h.get("points", 0) or 0,
-            "comments": h.get("num_comments", 0) or 0,
-        }
+        Story(
+            id=int(h["objectID"]),
+            title=(title := h.get("title", "")),
+            title_lower=title.lower(),
+            url=h.get("url", ""),
+            points=h.get("points", 0) or 0,
+            comments=h.get("num_comments", 0) or 0,
+        )
         for h in hits
     ]
 
 
-def fetch_stories(
-    session: httpx.Client, days: int, min_points: int, tag: str = "story",
+async def _fetch_page(
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    since: int,
+    min_points: int,
+    tag: str,
+    page: int,
 ) -> list[dict]:
-    """Fetch stories from last N days, filtered by tag."""
+    """Fetch one result page from Algolia, revalidating a cached copy if present."""
+    cache = get_cache()
+    cache_key = f"hn|{tag}|{min_points}|{page}|{since}"
+    cached = cache.get_response(cache_key)
+
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        elif last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    async with sem:
+        r = await client.get(HN_API, params={
+            "tags": tag,
+            "numericFilters": f"created_at_i>{since},points>={min_points}",
+            "hitsPerPage": 100,
+            "page": page,
+        }, headers=headers, timeout=30)
+
+    if r.status_code == 304 and cached:
+        return orjson.loads(cached[2]).get("hits", [])
+    r.raise_for_status()
+
+    etag = r.headers.get("ETag", "")
+    last_modified = r.headers.get("Last-Modified", "")
+    if etag or last_modified:
+        cache.set_response(cache_key, etag, last_modified, r.content)
+    return orjson.loads(r.content).get("hits", [])
+
+
+async def _fetch_all_pages(days: int, min_points: int, tag: str) -> list[Story]:
+    """Fetch all result pages concurrently and flatten them in page order."""
+    # Quantized to the hour so retries within the same window hit identical
+    # URLs and can be answered with cheap 304s instead of full pages
     since = int((datetime.now(timezone.utc) - timedelta(days=days)).timestamp())
-    stories = []
-
-    for page in range(5):
-        try:
-            r = session.get(HN_API, params={
-                "tags": tag,
-                "numericFilters": f"created_at_i>{since},points>={min_points}",
-                "hitsPerPage": 100,
-                "page": page,
-            }, timeout=30)
-            r.raise_for_status()
-            hits = r.json().get("hits", [])
-            if not hits:
-                break
-            stories.extend(_parse_hits(hits))
-            time.sleep(0.2)
-        except Exception as e:
-            log.warning(f"Fetch error: {e}")
-            break
+    since -= since % 3600
+    sem = asyncio.Semaphore(3)
+
+    async with get_async_client() as client:
+        pages = await asyncio.gather(
+            *(
+                _fetch_page(client, sem, since, min_points, tag, page)
+                for page in range(MAX_PAGES)
+            ),
+            return_exceptions=True,
+        )
 
+    # Flatten in page order; stop at the first empty or failed page so the
+    # result stays a contiguous prefix, same as the old sequential loop
+    stories: list[Story] = []
+    for hits in pages:
+        if isinstance(hits, BaseException):
+            log.warning(f"Fetch error: {hits}")
+            break
+        if not hits:
+            break
+        stories.extend(_parse_hits(hits))
     return stories
 
 
-def select_stories(stories: list[dict], limit: int) -> list[dict]:
+def fetch_stories(days: int, min_points: int, tag: str = "story") -> list[Story]:
+    """Fetch stories from last N days, filtered by tag."""
+    return asyncio.run(_fetch_all_pages(days, min_points, tag))
+
+
+def select_stories(stories: list[Story], limit: int) -> list[Story]:
     """Select top stories, filtering jobs and limiting per domain."""
     filtered = []
     for s in stories:
-        title_lower = s["title"].lower()
-        if any(w in title_lower for w in JOB_WORDS):
+        if _JOB_RE.search(s.title_lower):
             continue
-        if not s["url"] and len(s["title"]) < 20:
+        if not s.url and len(s.title) < 20:
             continue
-        s["score"] = s["points"] + s["comments"] * 2
-        s["domain"] = urlparse(s["url"]).netloc.replace("www.", "") if s["url"] else ""
+        s.score = s.points + s.comments * 2
+        s.domain = _domain(s.url) if s.url else ""
         filtered.append(s)
 
-    filtered.sort(key=lambda x: x["score"], reverse=True)
+    filtered.sort(key=attrgetter("score"), reverse=True)
 
     # Limit 3 per domain
     domain_count: dict[str, int] = {}
     result = []
     for s in filtered:
-        d = s["domain"]
+        d = s.domain
         if domain_count.get(d, 0) < 3:
             result.append(s)
             domain_count[d] = domain_count.get(d, 0) + 1
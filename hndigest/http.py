@@ -1,8 +1,52 @@
-"""HTTP client with retry logic."""
+"""HTTP clients and retry logic."""
+
+import random
+import time
 
 import httpx
 
+MAX_RETRIES = 5
+MAX_BACKOFF = 60.0
+
+# For requests serialized with orjson (httpx's json= uses the slower stdlib json)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def retryable(response: httpx.Response) -> bool:
+    """Whether a response is worth retrying (rate limit or server error)."""
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def sleep_for_retry(response: httpx.Response, attempt: int) -> None:
+    """Sleep before retrying a rate-limited or 5xx response.
+
+    Honors a numeric Retry-After header when the server sends one; otherwise
+    exponential backoff with full jitter so parallel workers don't retry in
+    lockstep.
+    """
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        wait = min(MAX_BACKOFF, float(retry_after))
+    else:
+        wait = min(MAX_BACKOFF, random.uniform(0, 2**attempt))
+    time.sleep(wait)
+
 
 def get_client() -> httpx.Client:
-    transport = httpx.HTTPTransport(retries=3)
-    return httpx.Client(transport=transport)
+    """Shared sync client: HTTP/2 + keep-alive so repeated API calls reuse one TLS session."""
+    return httpx.Client(
+        http2=True,
+        transport=httpx.HTTPTransport(retries=3),
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Async client for parallel article fetching: HTTP/2 + keep-alive."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=50),
+        timeout=15,
+        follow_redirects=True,
+    )
@@ -1,25 +1,39 @@
-"""Unified Gemini processing: categorize, rank, translate, and summarize in one call."""
+"""Unified Gemini processing: categorize, translate, summarize, and rank stories."""
 
-import hashlib
+import asyncio
+import re
 import time
-from dataclasses import dataclass
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, replace
 
 import httpx
-
-from hndigest.categorize import VALID_CATEGORIES, _extract_field
-from hndigest.config import CACHE_DIR, GEMINI_API, Channel, log
-
-PROCESS_PROMPT = """You are a Hacker News editor curating a weekly digest.
+import orjson
+import xxhash
+
+from hndigest.cache import get_cache
+from hndigest.categorize import VALID_CATEGORIES
+from hndigest.config import (
+    GEMINI_API,
+    GEMINI_CACHE_API,
+    GEMINI_MODEL,
+    GEMINI_STREAM_API,
+    Channel,
+    log,
+)
+from hndigest.hn import Story
+from hndigest.http import JSON_HEADERS, get_async_client
+
+BATCH_SIZE = 10
+
+# Static instructions, identical across runs of the same channel — kept separate
+# from the story block so they can be served from Gemini's explicit prompt cache.
+PROCESS_PREFIX = """You are a Hacker News editor curating a weekly digest.
 
 For each story below, do ALL of the following:
 1. Categorize into ONE category: ai, dev, ops, data, science, security, tech, career, culture
    (Do NOT assign show_hn or ask_hn — those are detected separately)
-2. Mark the 10 most interesting stories as "top" rank (others are "regular"):
-   - Genuinely novel, important, or thought-provoking
-   - NOT just highest points — a brilliant technical post beats routine drama
-   - Prefer diversity: don't put 10 AI stories in top
-3. {translation_instruction}
-4. Write a one-sentence summary (max 20 words) in {language}
+2. {translation_instruction}
+3. Write a one-sentence summary (max 20 words) in {language}
 
 Category guide:
 - ai: AI/ML, LLMs, autonomous vehicles, neural networks, robotics
@@ -32,14 +46,26 @@ Category guide:
 - career: Remote work, hiring, burnout, productivity, salaries
 - culture: History, urbanism, philosophy, gaming, typography, design, copyright, digital rights
 
+Return EXACTLY one line per story in this format:
+1. category=ai, title=Translated title here, summary=One sentence summary here
+2. category=dev, title=Another title, summary=Another summary
+
+IMPORTANT: Return one line for EVERY story. Do not skip any."""
+
+# Ranking needs all stories at once, so it runs as a separate titles-only pass
+RANK_PROMPT = """You are a Hacker News editor curating a weekly digest.
+
+From the stories below, pick the 10 most interesting:
+- Genuinely novel, important, or thought-provoking
+- NOT just highest points — a brilliant technical post beats routine drama
+- Prefer diversity: don't pick 10 AI stories
+
 Stories:
 {stories}
 
-Return EXACTLY one line per story in this format:
-1. category=ai, rank=top, title=Translated title here, summary=One sentence summary here
-2. category=dev, rank=regular, title=Another title, summary=Another summary
+Return ONLY the numbers of your 10 picks, comma-separated (e.g. 2, 5, 8)."""
 
-IMPORTANT: Return one line for EVERY story. Do not skip any."""
+CACHE_TTL = "3600s"  # Matches the cron cadence; expired names just fall back
 
 TRANSLATION_TRANSLATE = "Translate the title to {language} ({instructions})"
 TRANSLATION_KEEP = "Keep the original title as-is (do not translate)"
@@ -55,29 +81,35 @@ class StoryResult:
 
 def _content_hash(content: str) -> str:
     """Short hash of content for cache key differentiation."""
-    return hashlib.md5(content.encode()).hexdigest()[:8]
+    return xxhash.xxh3_128(content.encode()).hexdigest()[:8]
 
 
-def _cache_key_for_story(story: dict, content: str, language: str) -> str:
+def _cache_key_for_story(story: Story, content: str, language: str) -> str:
     """Generate cache key for a single story result."""
     content_h = _content_hash(content) if content else "empty"
-    raw = f"process_v1|{story['id']}|{story['title']}|{content_h}|{language}"
-    return hashlib.md5(raw.encode()).hexdigest()
+    raw = f"process_v1|{story.id}|{story.title}|{content_h}|{language}"
+    return f"process|{xxhash.xxh3_128(raw.encode()).hexdigest()}"
+
+
+# Mirrors _serialize_result's fixed field order; title/summary keep their
+# commas because the earlier fields anchor the split
+_CACHE_RE = re.compile(
+    r"category=(?P<cat>\w+),rank=(?P<rank>\w+),"
+    r"title=(?P<title>.*?),summary=(?P<summary>.*)$",
+    re.DOTALL,
+)
 
 
 def _parse_cache_line(val: str) -> StoryResult | None:
     """Parse cached value like 'category=ai,rank=top,title=...,summary=...'."""
-    cat = _extract_field(val, "category")
-    rank = _extract_field(val, "rank")
-    title = _extract_field(val, "title")
-    summary = _extract_field(val, "summary")
-    if cat not in VALID_CATEGORIES:
+    m = _CACHE_RE.match(val)
+    if m is None or m["cat"] not in VALID_CATEGORIES:
         return None
     return StoryResult(
-        category=cat,
-        is_top=rank == "top",
-        translation=title,
-        summary=summary,
+        category=m["cat"],
+        is_top=m["rank"] == "top",
+        translation=m["title"],
+        summary=m["summary"],
     )
 
 
@@ -87,12 +119,8 @@ def _serialize_result(r: StoryResult) -> str:
     return f"category={r.category},rank={rank},title={r.translation},summary={r.summary}"
 
 
-def _build_prompt(
-    stories: list[dict],
-    contents: dict[int, str],
-    channel: Channel,
-) -> str:
-    """Build the mega-prompt for all stories."""
+def _prompt_prefix(channel: Channel) -> str:
+    """Render the static instruction prefix for a channel."""
     if channel.prompt:
         translation_instruction = TRANSLATION_TRANSLATE.format(
             language=channel.language,
@@ -101,25 +129,77 @@ def _build_prompt(
     else:
         translation_instruction = TRANSLATION_KEEP
 
+    return PROCESS_PREFIX.format(
+        translation_instruction=translation_instruction,
+        language=channel.language,
+    )
+
+
+def _story_block(stories: list[Story], contents: dict[int, str]) -> str:
+    """Render the variable story block appended after the cached prefix."""
     story_lines = []
     for i, s in enumerate(stories):
-        points = s.get("points", 0)
-        comments = s.get("comments", 0)
-        parts = [f"{i + 1}. Title: {s['title']} ({points} pts, {comments} comments)"]
-        content = contents.get(s["id"], "")
+        parts = [f"{i + 1}. Title: {s.title} ({s.points} pts, {s.comments} comments)"]
+        content = contents.get(s.id, "")
         if content:
-            parts.append(f"Article: {content[:12000]}")
+            if len(content) > 12000:
+                content = content[:12000]
+            parts.append(f"Article: {content}")
         story_lines.append("\n".join(parts))
 
-    return PROCESS_PROMPT.format(
-        translation_instruction=translation_instruction,
-        language=channel.language,
-        stories="\n---\n".join(story_lines),
-    )
+    return "Stories:\n" + "\n---\n".join(story_lines)
+
+
+def _prefix_cache_key(channel: Channel) -> str:
+    """KV key under which the channel's cached-prefix name is persisted."""
+    return f"gemini_cached|{channel.id}|{time.strftime('%Y-%m-%d', time.gmtime())}"
+
+
+async def _cached_prefix_name(
+    client: httpx.AsyncClient, api_key: str, channel: Channel
+) -> str | None:
+    """Create or reuse an explicit Gemini cache entry for the static prefix.
+
+    The returned name is persisted per (channel, day) so repeated runs within
+    the TTL reuse it. Returns None when caching is unavailable — callers fall
+    back to sending the full prompt.
+    """
+    cache = get_cache()
+    key = _prefix_cache_key(channel)
+    name = cache.get(key)
+    if name:
+        return name
+
+    try:
+        r = await client.post(
+            f"{GEMINI_CACHE_API}?key={api_key}",
+            content=orjson.dumps({
+                "model": GEMINI_MODEL,
+                "contents": [{"parts": [{"text": _prompt_prefix(channel)}], "role": "user"}],
+                "ttl": CACHE_TTL,
+            }),
+            headers=JSON_HEADERS,
+            timeout=30,
+        )
+        r.raise_for_status()
+        name = orjson.loads(r.content)["name"]
+        cache.set(key, name)
+        return name
+    except Exception as e:
+        log.debug(f"Prompt cache unavailable: {e}")
+        return None
+
+
+# All three fields captured in one scan instead of repeated _extract_field passes
+_LINE_RE = re.compile(
+    r"category\s*=\s*(?P<cat>\w+)\s*,\s*"
+    r"title\s*=\s*(?P<title>.*?),\s*summary\s*=\s*(?P<summary>.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
 
 
 def _parse_result_line(line: str) -> tuple[int, StoryResult] | None:
-    """Parse a single result line like '1. category=ai, rank=top, title=..., summary=...'."""
+    """Parse a single result line like '1. category=ai, title=..., summary=...'."""
     line = line.strip()
     if not line or not line[0].isdigit():
         return None
@@ -133,107 +213,236 @@ def _parse_result_line(line: str) -> tuple[int, StoryResult] | None:
     except ValueError:
         return None
 
-    rest = parts[1].strip()
-    rest_lower = rest.lower()
-
-    cat = _extract_field(rest_lower, "category")
-    rank = _extract_field(rest_lower, "rank")
-
-    # Extract title and summary preserving original case
-    title = _extract_field(rest, "title")
-    summary = _extract_field(rest, "summary")
+    m = _LINE_RE.search(parts[1])
+    if m is None:
+        return None
 
+    cat = m["cat"].lower()
     if cat not in VALID_CATEGORIES:
         cat = "culture"
 
     return num, StoryResult(
         category=cat,
-        is_top=rank == "top",
-        translation=title.strip("\"'"),
-        summary=summary.strip("\"'"),
+        is_top=False,  # Ranking is merged in from the separate pass
+        translation=m["title"].strip().strip("\"'"),
+        summary=m["summary"].strip().strip("\"'"),
+    )
+
+
+async def _generate(client: httpx.AsyncClient, api_key: str, payload: dict, timeout: int) -> str:
+    """One generateContent call, returning the response text."""
+    r = await client.post(
+        f"{GEMINI_API}?key={api_key}",
+        content=orjson.dumps(payload),
+        headers=JSON_HEADERS,
+        timeout=timeout,
     )
+    r.raise_for_status()
+    return orjson.loads(r.content)["candidates"][0]["content"]["parts"][0]["text"].strip()
+
+
+async def _generate_stream(
+    client: httpx.AsyncClient, api_key: str, payload: dict, timeout: int
+) -> AsyncIterator[str]:
+    """Stream a streamGenerateContent call, yielding text pieces as they arrive."""
+    url = f"{GEMINI_STREAM_API}?alt=sse&key={api_key}"
+    async with client.stream(
+        "POST", url, content=orjson.dumps(payload), headers=JSON_HEADERS, timeout=timeout
+    ) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[6:]
+            if data == "[DONE]":
+                break
+            try:
+                yield orjson.loads(data)["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, orjson.JSONDecodeError):
+                continue
+
+
+def _collect_line(line: str, batch: list[Story], results: dict[int, "StoryResult"]) -> None:
+    """Parse one completed response line into results, ignoring non-story lines."""
+    parsed = _parse_result_line(line)
+    if parsed is None:
+        return
+    num, result = parsed
+    if 0 <= num < len(batch):
+        results[batch[num].id] = result
+
+
+async def _process_batch(
+    client: httpx.AsyncClient,
+    api_key: str,
+    batch: list[Story],
+    contents: dict[int, str],
+    channel: Channel,
+    cached_name: str | None,
+) -> dict[int, StoryResult]:
+    """Categorize, translate, and summarize one batch of stories."""
+    suffix = _story_block(batch, contents)
+
+    for attempt in range(3):
+        if cached_name:
+            payload: dict = {
+                "cachedContent": cached_name,
+                "contents": [{"parts": [{"text": suffix}]}],
+                "generationConfig": {"temperature": 0.3, "maxOutputTokens": 2000},
+            }
+        else:
+            payload = {
+                "contents": [{"parts": [{"text": f"{_prompt_prefix(channel)}\n\n{suffix}"}]}],
+                "generationConfig": {"temperature": 0.3, "maxOutputTokens": 2000},
+            }
+        try:
+            # Parse completed lines while the rest of the response is still
+            # being generated instead of buffering the whole body
+            results: dict[int, StoryResult] = {}
+            buffer = ""
+            async for piece in _generate_stream(client, api_key, payload, timeout=120):
+                buffer += piece
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    _collect_line(line, batch, results)
+            _collect_line(buffer, batch, results)
+            return results
+
+        except httpx.HTTPStatusError as e:
+            if cached_name and e.response.status_code in (400, 403, 404):
+                # Cached prefix expired or was rejected — drop the stored name
+                # so other batches and later runs don't re-fail on it, and
+                # retry this batch with the full prompt
+                log.warning("Cached prompt rejected, retrying with full prompt")
+                get_cache().delete(_prefix_cache_key(channel))
+                cached_name = None
+            elif e.response.status_code == 429:
+                wait = (attempt + 1) * 10
+                log.warning(f"Rate limited, waiting {wait}s...")
+                await asyncio.sleep(wait)
+            else:
+                log.warning(f"Batch processing failed: {e}")
+                return {}
+        except Exception as e:
+            log.warning(f"Batch processing failed: {e}")
+            return {}
+
+    return {}
+
+
+async def _rank_stories(
+    client: httpx.AsyncClient, api_key: str, stories: list[Story]
+) -> set[int]:
+    """Pick the top-10 story IDs from a titles-only prompt."""
+    lines = "\n".join(f"{i + 1}. {s.title} ({s.points} pts)" for i, s in enumerate(stories))
+    payload = {
+        "contents": [{"parts": [{"text": RANK_PROMPT.format(stories=lines)}]}],
+        "generationConfig": {"temperature": 0.3, "maxOutputTokens": 100},
+    }
+
+    for attempt in range(3):
+        try:
+            response_text = await _generate(client, api_key, payload, timeout=60)
+            top_ids: set[int] = set()
+            for tok in re.findall(r"\d+", response_text):
+                num = int(tok) - 1
+                if 0 <= num < len(stories):
+                    top_ids.add(stories[num].id)
+            return top_ids
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429:
+                wait = (attempt + 1) * 10
+                log.warning(f"Rate limited, waiting {wait}s...")
+                await asyncio.sleep(wait)
+            else:
+                log.warning(f"Ranking failed: {e}")
+                return set()
+        except Exception as e:
+            log.warning(f"Ranking failed: {e}")
+            return set()
+
+    return set()
+
+
+async def _process_all(
+    api_key: str,
+    stories: list[Story],
+    uncached: list[Story],
+    contents: dict[int, str],
+    channel: Channel,
+) -> tuple[dict[int, StoryResult], set[int]]:
+    """Run ranking and all story batches concurrently over one HTTP/2 client."""
+    async with get_async_client() as client:
+        cached_name = await _cached_prefix_name(client, api_key, channel)
+        batches = [uncached[i : i + BATCH_SIZE] for i in range(0, len(uncached), BATCH_SIZE)]
+        outcomes = await asyncio.gather(
+            _rank_stories(client, api_key, stories),
+            *(_process_batch(client, api_key, b, contents, channel, cached_name) for b in batches),
+        )
+
+    top_ids: set[int] = outcomes[0]
+    fresh: dict[int, StoryResult] = {}
+    for batch_results in outcomes[1:]:
+        fresh.update(batch_results)
+    return fresh, top_ids
 
 
 def process_stories(
-    session: httpx.Client,
     api_key: str,
-    stories: list[dict],
+    stories: list[Story],
     contents: dict[int, str],
     channel: Channel,
 ) -> dict[int, StoryResult]:
-    """Categorize, rank, translate, and summarize all stories in one Gemini call.
+    """Categorize, rank, translate, and summarize all stories via Gemini.
 
-    Returns {story_id: StoryResult} for each successfully processed story.
+    Uncached stories go out as parallel micro-batches of BATCH_SIZE, so a 429
+    or 5xx costs only one batch; ranking runs as a cheap titles-only call over
+    all stories. Returns {story_id: StoryResult} for each processed story.
     """
     if not api_key or not stories:
         return {}
 
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache = get_cache()
 
-    # Check cache for all stories
+    # Check cache for all stories with one bulk read
+    keys = {
+        s.id: _cache_key_for_story(s, contents.get(s.id, ""), channel.language)
+        for s in stories
+    }
+    values = cache.get_many(list(keys.values()))
     cached: dict[int, StoryResult] = {}
     for s in stories:
-        content = contents.get(s["id"], "")
-        cache_key = _cache_key_for_story(s, content, channel.language)
-        cache_file = CACHE_DIR / f"{cache_key}.txt"
-        if cache_file.exists():
-            val = cache_file.read_text(encoding="utf-8").strip()
-            result = _parse_cache_line(val)
+        val = values.get(keys[s.id])
+        if val is not None:
+            result = _parse_cache_line(val.strip())
             if result:
-                cached[s["id"]] = result
+                cached[s.id] = result
 
     if len(cached) == len(stories):
         log.info("All stories found in cache")
         return cached
 
-    # Build and send mega-prompt (ranking needs full context, so send all)
-    prompt = _build_prompt(stories, contents, channel)
-
-    for attempt in range(3):
-        try:
-            r = session.post(
-                f"{GEMINI_API}?key={api_key}",
-                json={
-                    "contents": [{"parts": [{"text": prompt}]}],
-                    "generationConfig": {"temperature": 0.3, "maxOutputTokens": 8000},
-                },
-                timeout=120,
-            )
-            r.raise_for_status()
-            response_text = r.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
-
-            # Parse response
-            results: dict[int, StoryResult] = {}
-            for line in response_text.split("\n"):
-                parsed = _parse_result_line(line)
-                if parsed is None:
-                    continue
-                num, result = parsed
-                if not (0 <= num < len(stories)):
-                    continue
-                story = stories[num]
-                results[story["id"]] = result
-
-                # Write cache
-                content = contents.get(story["id"], "")
-                cache_key = _cache_key_for_story(story, content, channel.language)
-                cache_file = CACHE_DIR / f"{cache_key}.txt"
-                cache_file.write_text(_serialize_result(result), encoding="utf-8")
-
-            log.info(f"Processed {len(results)}/{len(stories)} stories via Gemini")
-            return results
+    uncached = [s for s in stories if s.id not in cached]
+    fresh, top_ids = asyncio.run(_process_all(api_key, stories, uncached, contents, channel))
 
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                wait = (attempt + 1) * 10
-                log.warning(f"Rate limited, waiting {wait}s...")
-                time.sleep(wait)
-            else:
-                log.warning(f"Processing failed: {e}")
-                break
-        except Exception as e:
-            log.warning(f"Processing failed: {e}")
-            break
+    if not fresh and not top_ids:
+        log.warning("All processing attempts failed, returning cached results only")
+        return cached
 
-    log.warning("All processing attempts failed, returning cached results only")
-    return cached
+    # Merge fresh batch results with cached entries; re-rank everything when
+    # the ranking pass succeeded, otherwise keep cached ranks
+    results: dict[int, StoryResult] = {}
+    to_cache: list[tuple[str, str]] = []
+    for s in stories:
+        result = fresh.get(s.id) or cached.get(s.id)
+        if result is None:
+            continue
+        if top_ids:
+            result = replace(result, is_top=s.id in top_ids)
+        results[s.id] = result
+        if s.id in fresh or top_ids:
+            to_cache.append((keys[s.id], _serialize_result(result)))
+    cache.set_many(to_cache)
+
+    log.info(f"Processed {len(results)}/{len(stories)} stories via Gemini")
+    return results
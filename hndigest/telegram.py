@@ -1,13 +1,22 @@
 """Telegram message posting."""
 
+import asyncio
 from collections.abc import Callable
 
 import httpx
+import orjson
 
 from hndigest.config import TELEGRAM_API, TELEGRAM_EDIT_API, log
+from hndigest.http import JSON_HEADERS, get_async_client
 
 
-def post_to_telegram(token: str, chat_id: str, text: str, reply_to: int | None = None) -> int | None:
+async def post_to_telegram(
+    client: httpx.AsyncClient,
+    token: str,
+    chat_id: str,
+    text: str,
+    reply_to: int | None = None,
+) -> int | None:
     """Post message to Telegram channel. Returns message_id on success."""
     try:
         payload: dict = {
@@ -19,9 +28,14 @@ def post_to_telegram(token: str, chat_id: str, text: str, reply_to: int | None =
         if reply_to is not None:
             payload["reply_to_message_id"] = reply_to
 
-        r = httpx.post(TELEGRAM_API.format(token), json=payload, timeout=30)
+        r = await client.post(
+            TELEGRAM_API.format(token),
+            content=orjson.dumps(payload),
+            headers=JSON_HEADERS,
+            timeout=30,
+        )
         r.raise_for_status()
-        message_id = r.json()["result"]["message_id"]
+        message_id = orjson.loads(r.content)["result"]["message_id"]
         log.info(f"Posted to {chat_id} (msg {message_id})")
         return message_id
     except Exception as e:
@@ -31,7 +45,9 @@ def post_to_telegram(token: str, chat_id: str, text: str, reply_to: int | None =
         return None
 
 
-def edit_message(token: str, chat_id: str, message_id: int, text: str) -> bool:
+async def edit_message(
+    client: httpx.AsyncClient, token: str, chat_id: str, message_id: int, text: str
+) -> bool:
     """Edit an existing Telegram message. Returns True on success."""
     try:
         payload = {
@@ -41,7 +57,12 @@ def edit_message(token: str, chat_id: str, message_id: int, text: str) -> bool:
             "parse_mode": "HTML",
             "disable_web_page_preview": True,
         }
-        r = httpx.post(TELEGRAM_EDIT_API.format(token), json=payload, timeout=30)
+        r = await client.post(
+            TELEGRAM_EDIT_API.format(token),
+            content=orjson.dumps(payload),
+            headers=JSON_HEADERS,
+            timeout=30,
+        )
         r.raise_for_status()
         log.info(f"Edited message {message_id} in {chat_id}")
         return True
@@ -50,6 +71,44 @@ def edit_message(token: str, chat_id: str, message_id: int, text: str) -> bool:
         return False
 
 
+async def _post_thread_async(
+    token: str,
+    chat_id: str,
+    messages: list[str],
+    reply_categories: list[str] | None,
+    edit_main_callback: Callable[[str, list[str], list[int]], str] | None,
+) -> bool:
+    """Post the main message, then fire all category replies concurrently."""
+    async with get_async_client() as client:
+        main_id = await post_to_telegram(client, token, chat_id, messages[0])
+        if main_id is None:
+            return False
+
+        # Replies only need main_id, so they can all go out at once; the
+        # semaphore keeps us under Telegram's per-channel rate limit and
+        # gather preserves input order for the category/message-id pairing
+        sem = asyncio.Semaphore(3)
+
+        async def post_reply(msg: str) -> int | None:
+            async with sem:
+                return await post_to_telegram(client, token, chat_id, msg, reply_to=main_id)
+
+        raw_ids = await asyncio.gather(*(post_reply(msg) for msg in messages[1:]))
+
+        # One edit linking whatever replies made it — a partial failure still
+        # gets links for the successful categories instead of none at all
+        if reply_categories and edit_main_callback:
+            pairs = [(cat, mid) for cat, mid in zip(reply_categories, raw_ids) if mid is not None]
+            if pairs:
+                cats = [cat for cat, _ in pairs]
+                reply_ids = [mid for _, mid in pairs]
+                updated_text = edit_main_callback(messages[0], cats, reply_ids)
+                if updated_text != messages[0]:
+                    await edit_message(client, token, chat_id, main_id, updated_text)
+
+    return True
+
+
 def post_thread(
     token: str,
     chat_id: str,
@@ -66,20 +125,6 @@ def post_thread(
     if not messages:
         return False
 
-    main_id = post_to_telegram(token, chat_id, messages[0])
-    if main_id is None:
-        return False
-
-    reply_ids: list[int] = []
-    for msg in messages[1:]:
-        msg_id = post_to_telegram(token, chat_id, msg, reply_to=main_id)
-        if msg_id is not None:
-            reply_ids.append(msg_id)
-
-    # Edit main post with links to category replies
-    if reply_categories and edit_main_callback and len(reply_ids) == len(reply_categories):
-        updated_text = edit_main_callback(messages[0], reply_categories, reply_ids)
-        if updated_text != messages[0]:
-            edit_message(token, chat_id, main_id, updated_text)
-
-    return True
+    return asyncio.run(
+        _post_thread_async(token, chat_id, messages, reply_categories, edit_main_callback)
+    )
@@ -1,11 +1,17 @@
-"""Gemini-based title translation with file caching."""
+"""Gemini-based title translation with caching."""
 
-import hashlib
-import time
+import re
 
 import httpx
+import orjson
+from xxhash import xxh3_64_hexdigest
 
-from hndigest.config import CACHE_DIR, GEMINI_API, log
+from hndigest.cache import get_cache
+from hndigest.config import GEMINI_API, log
+from hndigest.http import JSON_HEADERS, MAX_RETRIES, retryable, sleep_for_retry
+
+# Numbered response lines ("1. ..."), matched in one scan of the full response
+_RESP_RE = re.compile(r"^\s*(\d+)\.\s*(.+)$", re.MULTILINE)
 
 
 def translate_batch(
@@ -15,16 +21,18 @@ def translate_batch(
     if not prompt_base or not titles:
         return titles
 
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache = get_cache()
+
+    # One bulk read for all titles instead of a round-trip per key
+    keys = [_cache_key(prompt_base, title) for title in titles]
+    found = cache.get_many(keys)
 
-    # Check cache for all
     cached = {}
     uncached_idx = []
-    for i, title in enumerate(titles):
-        cache_key = hashlib.md5(f"{prompt_base[:20]}|{title}".encode()).hexdigest()
-        cache_file = CACHE_DIR / f"{cache_key}.txt"
-        if cache_file.exists():
-            cached[i] = cache_file.read_text(encoding="utf-8").strip()
+    for i, key in enumerate(keys):
+        val = found.get(key)
+        if val is not None:
+            cached[i] = val
         else:
             uncached_idx.append(i)
 
@@ -43,47 +51,39 @@ Quyidagi sarlavhalarni tarjima qil. Har bir tarjimani yangi qatordan yoz, raqaml
 
 Faqat tarjimalarni qaytar, raqamlari bilan (1. tarjima, 2. tarjima, ...)"""
 
-    for attempt in range(3):
+    for attempt in range(MAX_RETRIES):
         try:
             r = session.post(
                 f"{GEMINI_API}?key={api_key}",
-                json={
+                content=orjson.dumps({
                     "contents": [{"parts": [{"text": batch_prompt}]}],
                     "generationConfig": {"temperature": 0.3, "maxOutputTokens": 2000},
-                },
+                }),
+                headers=JSON_HEADERS,
                 timeout=60,
             )
             r.raise_for_status()
-            result = r.json()["candidates"][0]["content"]["parts"][0]["text"].strip()
+            result = orjson.loads(r.content)["candidates"][0]["content"]["parts"][0]["text"]
+            result = result.strip()
 
             # Parse numbered results
             translations = {}
-            for line in result.split("\n"):
-                line = line.strip()
-                if line and line[0].isdigit():
-                    parts = line.split(".", 1)
-                    if len(parts) == 2:
-                        num = int(parts[0].strip()) - 1
-                        trans = parts[1].strip().strip("\"'")
-                        if 0 <= num < len(uncached_titles):
-                            translations[num] = trans
+            for m in _RESP_RE.finditer(result):
+                num = int(m.group(1)) - 1
+                if 0 <= num < len(uncached_titles):
+                    translations[num] = m.group(2).strip().strip("\"'")
 
             # Cache results
             for local_idx, trans in translations.items():
                 orig_idx = uncached_idx[local_idx]
-                cache_key = hashlib.md5(
-                    f"{prompt_base[:20]}|{titles[orig_idx]}".encode()
-                ).hexdigest()
-                cache_file = CACHE_DIR / f"{cache_key}.txt"
-                cache_file.write_text(trans, encoding="utf-8")
+                cache.set(keys[orig_idx], trans)
                 cached[orig_idx] = trans
 
             break
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                wait = (attempt + 1) * 10
-                log.warning(f"Rate limited, waiting {wait}s...")
-                time.sleep(wait)
+            if retryable(e.response):
+                log.warning(f"Retryable error ({e.response.status_code}), backing off...")
+                sleep_for_retry(e.response, attempt)
             else:
                 log.warning(f"Batch translation failed: {e}")
                 break
@@ -94,3 +94,6 @@ Faqat tarjimalarni qaytar, raqamlari bilan (1. tarjima, 2. tarjima, ...)"""
     return [cached.get(i, titles[i]) for i in range(len(titles))]
 
 
+def _cache_key(prompt_base: str, title: str) -> str:
+    """Cache key for one title's translation."""
+    return "trans|" + xxh3_64_hexdigest(f"{prompt_base[:20]}|{title}".encode())